@@ -1,7 +1,9 @@
+import ast
+import os
+
 import streamlit as st
+import numpy as np
 import pandas as pd
-import plotly.express as px
-from sklearn.metrics.pairwise import cosine_similarity
 
 
 st.set_page_config(layout="wide")
@@ -9,13 +11,18 @@ st.set_page_config(layout="wide")
 # Load data
 @st.cache_data
 def load_data():
-    df = pd.read_csv("data/combined_tb_data_1990_2023.csv")
-    # Rename columns to shorter and more suitable names
-    df = df.rename(columns={
+    # Prefer the typed, compressed parquet produced by build_parquet.py; the
+    # columnar read skips CSV tokenization and the rename entirely.
+    parquet_path = "data/combined_tb_data_1990_2023.parquet"
+    if os.path.exists(parquet_path):
+        return pd.read_parquet(parquet_path)
+    # Shorter and more suitable names for the columns the app uses; the keys
+    # double as usecols so the parser never materializes anything else.
+    # iso2/iso_numeric are dropped entirely: nothing in the app reads them
+    # and iso3 already identifies every country.
+    column_renames = {
         "country": "country",
-        "iso2": "iso2",
         "iso3": "iso3",
-        "iso_numeric": "iso_num",
         "region": "region",
         "year": "year",
         "population": "population",
@@ -34,15 +41,565 @@ def load_data():
         "detection_rate": "detection_rate",
         "detection_rate_lo": "detection_rate_lo",
         "detection_rate_hi": "detection_rate_hi"
+    }
+    # Explicit dtypes: float32 is plenty of precision for the rate/bound
+    # columns and halves the memory of the cached frame; the pyarrow engine
+    # tokenizes the CSV much faster than the default parser.
+    dtypes = {
+        "year": "int32",
+        "population": "int32",
+        "country": "category",
+        "region": "category",
+        "iso3": "category",
+    }
+    for col in column_renames:
+        if col not in dtypes:
+            dtypes[col] = "float32"
+    df = pd.read_csv(
+        "data/combined_tb_data_1990_2023.csv",
+        engine="pyarrow",
+        usecols=list(column_renames),
+        dtype=dtypes,
+    )
+    df = df.rename(columns=column_renames)
+    # Estimated death counts are needed by five pages; materialize the
+    # product once here instead of allocating the temporaries per rerun.
+    df['actual_deaths'] = (
+        df['tb_mortality_100k'].to_numpy() * df['population'].to_numpy() / 100000
+    ).astype('float32')
+    # Sort so each country's years are contiguous: per-country group takes
+    # become sequential reads and line charts get pre-ordered x values.
+    return df.sort_values(['country', 'year']).reset_index(drop=True)
+
+
+# Node types a custom explorer query may contain: comparisons and boolean
+# logic over column names and literals, nothing that can call or import.
+ALLOWED_QUERY_NODES = (
+    ast.Expression, ast.Compare, ast.BoolOp, ast.UnaryOp, ast.BinOp,
+    ast.Name, ast.Load, ast.Constant, ast.List, ast.Tuple,
+    ast.And, ast.Or, ast.Not, ast.Invert, ast.USub,
+    ast.Gt, ast.Lt, ast.GtE, ast.LtE, ast.Eq, ast.NotEq, ast.In, ast.NotIn,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Mod, ast.BitAnd, ast.BitOr,
+)
+
+
+def validate_query(query):
+    # Allowlist the query's AST instead of scanning for substrings; anything
+    # outside plain comparison/boolean expressions is rejected.
+    tree = ast.parse(query, mode='eval')
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_QUERY_NODES):
+            raise ValueError(f"Invalid query: '{type(node).__name__}' expressions are not allowed.")
+
+
+@st.cache_data
+def run_explorer_query(explorer_df, query):
+    # numexpr evaluates the comparisons on contiguous numpy buffers, and the
+    # cache keeps repeated reruns of the same query free.
+    return explorer_df.query(query, engine='numexpr')
+
+
+def single_trace_bar(d, x, y, colorscale, title):
+    # One Bar trace with a precomputed per-row color vector. color=<category>
+    # makes Plotly emit a trace per country, which balloons the figure JSON
+    # and client render time as the category count grows.
+    codes = d[x].cat.codes.to_numpy()
+    uniq = np.unique(codes)
+    palette = px.colors.sample_colorscale(colorscale, np.linspace(0, 1, max(len(uniq), 2)))
+    marker_color = [palette[i] for i in np.searchsorted(uniq, codes)]
+    fig = go.Figure(go.Bar(x=d[x], y=d[y], marker_color=marker_color))
+    fig.update_layout(title=title, xaxis_title=x, yaxis_title=y, showlegend=False)
+    return fig
+
+
+def stratified_sample(d, per_region=150):
+    # Cap scatter payloads by sampling per region, so every region keeps its
+    # share of points and its distribution shape. Shuffle once with a fixed
+    # seed, then head() per group — no slow groupby.apply, no re-draw jitter.
+    if len(d) <= per_region * d['region'].nunique():
+        return d
+    order = np.random.default_rng(0).permutation(len(d))
+    return d.iloc[order].groupby('region', sort=False, observed=True).head(per_region)
+
+
+def bubble_sizes(population):
+    # Vectorized bubble-size prep: log-scale population in one numpy pass so
+    # the size mapping stays cheap however large the filtered frame gets, and
+    # mid-sized countries stay visible next to the billion-population ones.
+    return np.log1p(np.asarray(population, dtype=np.float64))
+
+
+def downsample(d, x, y, n=500):
+    # Largest-Triangle-Three-Buckets downsampling so long time series send at
+    # most n points to the browser. Series that already fit (the per-country
+    # year series are under 40 points) pass through untouched.
+    if len(d) <= n:
+        return d
+    xs = d[x].to_numpy(dtype=float)
+    ys = d[y].to_numpy(dtype=float)
+    # Bucket the interior points; always keep the first and last.
+    buckets = np.array_split(np.arange(1, len(d) - 1), n - 2)
+    keep = [0]
+    prev = 0
+    for i, bucket in enumerate(buckets):
+        if i + 1 < len(buckets):
+            next_bucket = buckets[i + 1]
+            avg_x, avg_y = xs[next_bucket].mean(), ys[next_bucket].mean()
+        else:
+            avg_x, avg_y = xs[-1], ys[-1]
+        # Pick the point forming the largest triangle with the previous kept
+        # point and the next bucket's average.
+        areas = np.abs(
+            (xs[prev] - avg_x) * (ys[bucket] - ys[prev])
+            - (xs[prev] - xs[bucket]) * (avg_y - ys[prev])
+        )
+        prev = bucket[np.argmax(areas)]
+        keep.append(prev)
+    keep.append(len(d) - 1)
+    return d.iloc[keep]
+
+
+@st.cache_resource
+def grouped_by(df, key):
+    # A groupby object built once per key; get_group() is then a hash lookup
+    # instead of an O(N) boolean scan on every widget interaction.
+    return df.groupby(key, sort=False, observed=True)
+
+
+# Cached aggregations derived from the full dataset. These only depend on df,
+# so computing them inside @st.cache_data functions means each groupby runs
+# once per process instead of on every widget interaction.
+@st.cache_data
+def yearly_totals(df):
+    # Global totals keyed by year, computed once. The key-metric panels show
+    # the mean across years (identical to the old sum/number-of-years
+    # normalization) without rescanning three full columns per rerun.
+    totals = df.groupby('year')[['population', 'tb_incident_cases_total', 'actual_deaths']].sum()
+    return totals.rename(columns={'actual_deaths': 'tb_deaths_total'})
+
+
+@st.cache_data
+def global_key_metrics(df):
+    # The three header scalars, cached so reruns don't even re-reduce the
+    # small yearly-totals table.
+    # formatted once here, so reruns do a dict lookup instead of round+format.
+    avg = yearly_totals(df).mean()
+    return {
+        'population': f"{round(avg['population']):,.0f}",
+        'incidence': f"{round(avg['tb_incident_cases_total']):,.0f}",
+        'deaths': f"{round(avg['tb_deaths_total']):,.0f}",
+    }
+
+
+@st.cache_data
+def country_summary(df):
+    # Per-country sums and means computed in one pass; the Trends and Country
+    # Profiles metric rows then index a single row instead of re-reducing the
+    # country slice on every rerun.
+    return df.groupby('country', observed=True).agg(
+        pop_sum=('population', 'sum'),
+        cases_sum=('tb_incident_cases_total', 'sum'),
+        deaths_sum=('actual_deaths', 'sum'),
+        incidence_mean=('tb_incidence_100k', 'mean'),
+        mortality_mean=('tb_mortality_100k', 'mean'),
+        cases_mean=('tb_incident_cases_total', 'mean'),
+        hiv_mean=('hiv_in_tb_percent', 'mean'),
+        detection_mean=('detection_rate', 'mean'),
+        n_years=('year', 'nunique'),
+    )
+
+
+@st.cache_data
+def incidence_mortality_fig_json(df, country):
+    # Both trend lines fused into a single go.Figure, serialized once per
+    # country. Caching the JSON skips rebuilding and re-serializing the
+    # figure on every rerun of the Trends page.
+    trend_df = grouped_by(df, 'country').get_group(country)
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=trend_df['year'], y=trend_df['tb_incidence_100k'],
+                             mode='lines', name='tb_incidence_100k'))
+    fig.add_trace(go.Scatter(x=trend_df['year'], y=trend_df['tb_mortality_100k'],
+                             mode='lines', name='tb_mortality_100k'))
+    fig.update_layout(
+        title=f"Incidence vs. Mortality Over Time in {country}",
+        xaxis_title="year",
+        yaxis_title="Rate per 100k",
+        legend_title_text="Metric"
+    )
+    return fig.to_json()
+
+
+@st.cache_resource
+def trend_page_figs(df, country):
+    # Every per-country figure on the Trends page, built once per country.
+    # Revisiting a country returns the same Figure objects instantly instead
+    # of re-running filter + Plotly Express construction on each rerun.
+    trend_df = grouped_by(df, 'country').get_group(country)
+    return {
+        'incidence_line': px.line(
+            downsample(trend_df, 'year', 'tb_incidence_100k'),
+            x='year',
+            y='tb_incidence_100k',
+            title=f"TB Incidence Trend in {country}",
+            color_discrete_sequence=["#636EFA"]
+        ),
+        'incidence_bar': px.bar(
+            trend_df,
+            x='year',
+            y='tb_incidence_100k',
+            title=f"Yearly TB Incidence in {country}",
+            color_discrete_sequence=["#636EFA"]
+        ),
+        'incidence_area': px.area(
+            trend_df,
+            x='year',
+            y='tb_incident_cases_total',
+            title=f"Total TB Incident Cases Over Time in {country}",
+            color_discrete_sequence=["#00CC96"],
+            labels={'tb_incident_cases_total': 'Total Cases'}
+        ),
+        'mortality_line': px.line(
+            downsample(trend_df, 'year', 'tb_mortality_100k'),
+            x='year',
+            y='tb_mortality_100k',
+            title=f"TB Mortality Trend in {country}",
+            color_discrete_sequence=["#EF553B"]
+        ),
+        'mortality_scatter': px.scatter(
+            trend_df,
+            render_mode="webgl",
+            x='tb_incidence_100k',
+            y='tb_mortality_100k',
+            title=f"Mortality vs. Incidence in {country}",
+            labels={"x": "Incidence per 100k", "y": "Mortality per 100k"},
+            color_discrete_sequence=["#EF553B"]
+        ),
+        'detection_line': px.line(
+            downsample(trend_df, 'year', 'detection_rate'),
+            x='year',
+            y='detection_rate',
+            title=f"TB Detection Rate Trend in {country}",
+            color_discrete_sequence=["#00CC96"]
+        ),
+        'hiv_line': px.line(
+            downsample(trend_df, 'year', 'hiv_in_tb_percent'),
+            x='year',
+            y='hiv_in_tb_percent',
+            title=f"HIV Percentage in TB Patients Trend in {country}",
+            color_discrete_sequence=["#FFA15A"]
+        ),
+        'incidence_hist': px.histogram(
+            trend_df,
+            x='tb_incidence_100k',
+            nbins=20,
+            title=f"Distribution of TB Incidence Rates in {country}"
+        ),
+    }
+
+
+@st.cache_data
+def region_totals(df):
+    # Prebuilt by build_parquet.py alongside the main snapshot; fall back to
+    # aggregating just the plotted column when the rollup is absent.
+    if os.path.exists('data/region_rollup.parquet'):
+        return pd.read_parquet('data/region_rollup.parquet')
+    return df.groupby('region', sort=False, observed=True).agg({'tb_incident_cases_total': 'sum'}).reset_index()
+
+
+@st.cache_data
+def region_yearly_avg(df, region):
+    # Per-year mean incidence within one region, cached per selection. Years
+    # form a small dense integer range, so the group-mean is two bincounts
+    # over year offsets rather than a hashed groupby.
+    d = grouped_by(df, 'region').get_group(region)
+    years = np.asarray(years_desc(df))[::-1]
+    y = d['year'].to_numpy() - years[0]
+    v = d['tb_incidence_100k'].to_numpy(dtype=np.float64)
+    ok = ~np.isnan(v)
+    sums = np.bincount(y[ok], weights=v[ok], minlength=len(years))
+    cnts = np.bincount(y[ok], minlength=len(years))
+    mask = cnts > 0
+    return pd.DataFrame({
+        'year': years[mask],
+        'tb_incidence_100k': sums[mask] / cnts[mask],
     })
-    return df
 
 
-# Add latitude and longitude columns using geopy (asynchronous version)
+@st.cache_data
+def top_countries(df, n=10):
+    # The build-time rollup covers the default top ten; other n fall through
+    # to the aggregation. Partial-sort keeps only the rows we plot.
+    if n == 10 and os.path.exists('data/country_rollup.parquet'):
+        return pd.read_parquet('data/country_rollup.parquet')
+    return df.groupby('country', sort=False, observed=True)['tb_incident_cases_total'].sum().nlargest(n).reset_index()
+
 
-df = load_data()
+# The Global Overview figures depend only on df, so build each Figure object
+# once per process with st.cache_resource; reruns then only pay for sending
+# the already-built figure to the browser.
+@st.cache_data
+def choropleth_source(df):
+    # One row per iso3: a static map renders a single color per country, so
+    # aggregate to the mean across years explicitly instead of letting Plotly
+    # silently keep the last row it sees for each location.
+    return df.groupby('iso3', as_index=False, observed=True).agg(
+        tb_incidence_100k=('tb_incidence_100k', 'mean'),
+        country=('country', 'first'),
+    )
 
-# Ensure latitude and longitude columns are added to the DataFrame
+
+@st.cache_resource
+def global_incidence_map(df):
+    map_fig = px.choropleth(
+        choropleth_source(df),
+        locations="iso3",
+        color="tb_incidence_100k",
+        hover_name="country",
+        projection="equirectangular",
+        title="Global TB Incidence by Country",
+        color_continuous_scale="Reds",
+        range_color=[0, df['tb_incidence_100k'].quantile(0.95)],  # Cap at 95th percentile to highlight differences
+        labels={"tb_incidence_100k": "Incidence per 100k"}
+    )
+    map_fig.update_layout(
+        geo=dict(
+            showframe=False,
+            showcoastlines=True,
+            projection_type='equirectangular'
+        ),
+        margin=dict(l=0, r=0, t=30, b=0)
+    )
+    return map_fig
+
+
+@st.cache_resource
+def region_pie_fig(df):
+    region_pie = px.pie(
+        region_totals(df),
+        names='region',
+        values='tb_incident_cases_total',
+        title="TB Incidence Distribution by Region",
+        color_discrete_sequence=px.colors.qualitative.Plotly, # Use Plotly qualitative palette
+        hole=0.4  # Make it a donut chart
+    )
+    region_pie.update_traces(textposition='inside', textinfo='percent+label')
+    return region_pie
+
+
+@st.cache_resource
+def top_countries_fig(df):
+    top_bar = px.bar(
+        top_countries(df),
+        x='country',
+        y='tb_incident_cases_total',
+        title="Top 10 Countries by TB Incidence",
+        color='tb_incident_cases_total',
+        color_continuous_scale="Viridis", # Use Viridis for sequential
+        labels={"tb_incident_cases_total": "Total Cases", "country": "Country"}
+    )
+    top_bar.update_layout(xaxis_tickangle=-45)
+    return top_bar
+
+
+@st.cache_resource
+def region_box_fig(df):
+    # Build the boxes from precomputed quantiles so the figure JSON carries
+    # five numbers per region instead of every raw data point
+    quantiles = grouped_by(df, 'region')['tb_incidence_100k'].quantile(
+        [0.0, 0.25, 0.5, 0.75, 1.0]).unstack()
+    box_fig = go.Figure()
+    palette = px.colors.qualitative.Set3  # Use Set3 qualitative palette
+    for i, (region, q) in enumerate(quantiles.iterrows()):
+        box_fig.add_trace(go.Box(
+            x=[region],
+            q1=[q[0.25]],
+            median=[q[0.5]],
+            q3=[q[0.75]],
+            lowerfence=[q[0.0]],
+            upperfence=[q[1.0]],
+            name=region,
+            marker_color=palette[i % len(palette)],
+        ))
+    box_fig.update_layout(
+        title="TB Incidence per 100k by Region",
+        xaxis_tickangle=-45,
+        yaxis_title="tb_incidence_100k",
+        xaxis_title="region",
+    )
+    return box_fig
+
+
+@st.cache_resource
+def incidence_mortality_scatter(df):
+    scatter_fig = px.scatter(
+        stratified_sample(df),
+        render_mode="webgl",
+        x='tb_incidence_100k',
+        y='tb_mortality_100k',
+        color='region',
+        hover_name='country',
+        title="TB Incidence vs. Mortality by Country",
+        size='population',
+        size_max=40,
+        color_discrete_sequence=px.colors.qualitative.Set3, # Use Set3 qualitative palette
+        labels={
+            "tb_incidence_100k": "Incidence per 100k",
+            "tb_mortality_100k": "Mortality per 100k"
+        }
+    )
+    scatter_fig.update_traces(marker=dict(line=dict(width=1, color='DarkSlateGrey')))
+    scatter_fig.update_layout(transition_duration=0)
+    return scatter_fig
+
+
+@st.cache_resource
+def mortality_hiv_scatter(df):
+    scatter_mortality_hiv = px.scatter(
+        stratified_sample(df),
+        render_mode="webgl",
+        x='tb_mortality_100k',
+        y='hiv_in_tb_percent',
+        color='region',
+        hover_name='country',
+        title="TB Mortality vs. HIV in TB Percentage Globally",
+        size='population', # Size points by population
+        size_max=40,
+        color_discrete_sequence=px.colors.qualitative.Set3, # Use Set3 qualitative palette
+        labels={
+            "tb_mortality_100k": "Mortality per 100k",
+            "hiv_in_tb_percent": "HIV in TB (%)"
+        }
+    )
+    scatter_mortality_hiv.update_traces(marker=dict(line=dict(width=1, color='DarkSlateGrey')))
+    scatter_mortality_hiv.update_layout(transition_duration=0)
+    return scatter_mortality_hiv
+
+
+@st.cache_resource
+def pop_incidence_scatter(df):
+    scatter_pop_incidence = px.scatter(
+        stratified_sample(df),
+        render_mode="webgl",
+        x='population',
+        y='tb_incident_cases_total',
+        color='region',
+        hover_name='country',
+        title="Population vs. Total TB Incident Cases Globally",
+        size='tb_incidence_100k', # Size points by incidence rate
+        size_max=40,
+        color_discrete_sequence=px.colors.qualitative.Set3,
+        labels={
+            "population": "Population",
+            "tb_incident_cases_total": "Total Incident Cases",
+            "tb_incidence_100k": "Incidence per 100k"
+        }
+    )
+    scatter_pop_incidence.update_traces(marker=dict(line=dict(width=1, color='DarkSlateGrey')))
+    scatter_pop_incidence.update_layout(transition_duration=0)
+    return scatter_pop_incidence
+
+
+@st.cache_resource
+def animated_map_fig(df, metric):
+    # The animated choropleth is the heaviest figure in the app (~34 frames);
+    # build it once per metric from just the four columns it needs instead of
+    # serializing the whole frame per rerun.
+    label = metric.replace('tb_', 'TB ').replace('_', ' ').title()
+    map_fig = px.choropleth(
+        df[['iso3', 'country', 'year', metric]],
+        locations="iso3",
+        color=metric,
+        hover_name="country",
+        animation_frame="year", # Animate based on the year column
+        projection="equirectangular",
+        title=f"Global {label} Over Time", # General title for animation
+        color_continuous_scale="Viridis", # Use Viridis for sequential data
+        labels={metric: label}
+    )
+    map_fig.update_layout(
+        geo=dict(
+            showframe=False,
+            showcoastlines=True,
+            projection_type='equirectangular'
+        ),
+        margin=dict(l=0, r=0, t=30, b=0),
+        height=700, # Further increase map height
+        width=1200, # Further increase map width
+        transition={'duration': 0}
+    )
+    return map_fig
+
+
+@st.cache_data
+def region_bits(df):
+    # One bit per region per row (the WHO set is 6 regions, far under 64), so
+    # a region selection reduces to a single vectorized AND against a uint64
+    # column instead of an isin scan over strings.
+    return np.uint64(1) << df['region'].cat.codes.to_numpy().astype(np.uint64)
+
+
+@st.cache_data
+def countries_slice(df, countries_sel):
+    # Rows for a set of countries assembled from the cached groupby's
+    # per-group indices — no frame-wide boolean mask per selection change.
+    groups = grouped_by(df, 'country')
+    return pd.concat([groups.get_group(c) for c in countries_sel])
+
+
+@st.cache_data
+def country_year_matrix(df, countries_sel):
+    # Dense country x year matrix for px.imshow, cached per selection. Only
+    # the three involved columns are filtered, and since (country, year) pairs
+    # are unique a plain pivot suffices — no pivot_table aggregation pass.
+    return df.loc[df['country'].isin(countries_sel), ['country', 'year', 'tb_incidence_100k']].pivot(
+        index='country',
+        columns='year',
+        values='tb_incidence_100k'
+    )
+
+
+# Widget option lists, cached as plain Python lists so building a selectbox
+# never rescans a full column.
+# Metrics that define a country's TB profile for the similarity page.
+SIMILARITY_COLS = [
+    'tb_incidence_100k',
+    'tb_mortality_100k',
+    'hiv_in_tb_percent',
+    'detection_rate',
+]
+
+
+@st.cache_data
+def similarity_matrix(df):
+    # Pairwise cosine similarity over the latest-year country profiles,
+    # computed once. Row-normalize and take X @ X.T directly — one BLAS
+    # matmul, no sklearn dependency or validation overhead.
+    latest_year = int(df['year'].max())
+    features = grouped_by(df, 'year').get_group(latest_year)[
+        ['country'] + SIMILARITY_COLS].set_index('country').dropna()
+    X = features.to_numpy(dtype=np.float64)
+    X = X / np.linalg.norm(X, axis=1, keepdims=True)
+    sim = pd.DataFrame(
+        X @ X.T,
+        index=features.index,
+        columns=features.index
+    )
+    return latest_year, sim
+
+
+@st.cache_data
+def countries(df):
+    return df['country'].cat.categories.tolist()
+
+
+@st.cache_data
+def regions(df):
+    return df['region'].cat.categories.tolist()
+
+
+@st.cache_data
+def years_desc(df):
+    return sorted(df['year'].unique().tolist(), reverse=True)
 
 
 # Sidebar navigation
@@ -50,7 +607,21 @@ st.sidebar.title("Navigation")
 pages = ["Documentation", "Global Overview", "Country Comparison", "Trends Over Time", "Regional Analysis", "Country Profiles", "Interactive Data Explorer", "Country Similarity Analysis", "Interactive Maps"]
 selected_page = st.sidebar.radio("Go to", pages)
 
-if selected_page == "Global Overview":
+# The Documentation page renders without touching the data file, so only load
+# the frame once a data page is selected (cached, so this is free afterwards).
+if selected_page != "Documentation":
+    # Plotly's import alone costs ~150ms; defer it with the data so a
+    # Documentation-only session never pays for either. The helpers above only
+    # touch these module globals when called, so binding them here is safe.
+    import plotly.express as px
+    import plotly.graph_objects as go
+    import plotly.io as pio
+    df = load_data()
+
+# Each page body runs as a fragment: widget interactions inside a page
+# rerun only that page, not the whole script.
+@st.fragment
+def page_global_overview():
     st.title("🌍 Global Overview")
     st.markdown("""
     This page provides a global overview of TB prevalence and mortality, allowing you to explore the distribution and scale of TB across countries and regions. Use the interactive charts to identify high-burden areas and compare prevalence, mortality, and trends globally.
@@ -67,25 +638,24 @@ if selected_page == "Global Overview":
 
     # Display key metrics
     st.subheader("Global Key Metrics")
+    global_metrics = global_key_metrics(df)
     col1, col2, col3 = st.columns(3)
     with col1:
         st.metric(
             "Total Population",
-            f"{round(df['population'].sum()/len(df['year'].unique())):,.0f}",
+            global_metrics['population'],
             help="Normalized to a single year (data spans multiple years) to avoid unrealistic totals."
         )
     with col2:
         st.metric(
             "Total TB Incidence",
-            f"{round(df['tb_incident_cases_total'].sum()/len(df['year'].unique())):,.0f}",
+            global_metrics['incidence'],
             help="Normalized to a single year (data spans multiple years) to avoid unrealistic totals."
         )
     with col3:
-        # Calculate actual deaths by using mortality rate and population, then normalize to a year
-        total_deaths = (df['tb_mortality_100k'] * df['population'] / 100000).sum() / len(df['year'].unique())
         st.metric(
             "Total TB Deaths",
-            f"{round(total_deaths):,.0f}",
+            global_metrics['deaths'],
             help="Normalized to a single year (data spans multiple years) to avoid unrealistic totals."
         )
     st.divider()
@@ -100,60 +670,22 @@ if selected_page == "Global Overview":
 
     # Update the Plotly map to color the countries instead of using blobs
     st.subheader("Global TB Incidence Map")
-    map_fig = px.choropleth(
-        df,
-        locations="iso3",
-        color="tb_incidence_100k",
-        hover_name="country",
-        projection="equirectangular",
-        title="Global TB Incidence by Country",
-        color_continuous_scale="Reds",
-        range_color=[0, df['tb_incidence_100k'].quantile(0.95)],  # Cap at 95th percentile to highlight differences
-        labels={"tb_incidence_100k": "Incidence per 100k"}
-    )
-    map_fig.update_layout(
-        geo=dict(
-            showframe=False,
-            showcoastlines=True,
-            projection_type='equirectangular'
-        ),
-        margin=dict(l=0, r=0, t=30, b=0)
-    )
-    st.plotly_chart(map_fig, use_container_width=True)
+    st.plotly_chart(global_incidence_map(df), use_container_width=True, key="global_incidence_map")
     st.divider()
 
     # Add a pie chart for TB incidence by region
-    st.subheader("TB Incidence by Region")
     # Use columns for side-by-side charts if space allows
     col_pie, col_top_bar = st.columns(2)
     with col_pie:
         st.subheader("TB Incidence by Region")
-        region_pie = px.pie(
-            df.groupby('region').sum().reset_index(),
-            names='region',
-            values='tb_incident_cases_total',
-            title="TB Incidence Distribution by Region",
-            color_discrete_sequence=px.colors.qualitative.Plotly, # Use Plotly qualitative palette
-            hole=0.4  # Make it a donut chart
-        )
-        region_pie.update_traces(textposition='inside', textinfo='percent+label')
-        st.plotly_chart(region_pie, use_container_width=True)
+        # Percent+label are drawn inside the slices, so the pie needs no
+        # event wiring at all — ship it as a static plot.
+        st.plotly_chart(region_pie_fig(df), use_container_width=True, config={'staticPlot': True}, key="region_pie_fig")
 
     # Add a bar chart for top 10 countries with highest TB incidence
     with col_top_bar:
         st.subheader("Top 10 Countries with Highest TB Incidence")
-        top_countries = df.groupby('country').sum().reset_index().nlargest(10, 'tb_incident_cases_total')
-        top_bar = px.bar(
-            top_countries,
-            x='country',
-            y='tb_incident_cases_total',
-            title="Top 10 Countries by TB Incidence",
-            color='tb_incident_cases_total',
-            color_continuous_scale="Viridis", # Use Viridis for sequential
-            labels={"tb_incident_cases_total": "Total Cases", "country": "Country"}
-        )
-        top_bar.update_layout(xaxis_tickangle=-45)
-        st.plotly_chart(top_bar, use_container_width=True)
+        st.plotly_chart(top_countries_fig(df), use_container_width=True, key="top_countries_fig")
 
     st.divider()
 
@@ -161,91 +693,33 @@ if selected_page == "Global Overview":
     col_box, col_scatter = st.columns(2)
     with col_box:
         st.subheader("TB Incidence Distribution by Region (Box Plot)")
-        box_fig = px.box(
-            df,
-            x='region',
-            y='tb_incidence_100k',
-            color='region',
-            title="TB Incidence per 100k by Region",
-            points="outliers",
-            color_discrete_sequence=px.colors.qualitative.Set3 # Use Set3 qualitative palette
-        )
-        box_fig.update_layout(xaxis_tickangle=-45)
-        st.plotly_chart(box_fig, use_container_width=True)
+        st.plotly_chart(region_box_fig(df), use_container_width=True, key="region_box_fig")
 
     with col_scatter:
         st.subheader("Incidence vs. Mortality (Scatter Plot)")
-        scatter_fig = px.scatter(
-            df,
-            x='tb_incidence_100k',
-            y='tb_mortality_100k',
-            color='region',
-            hover_name='country',
-            title="TB Incidence vs. Mortality by Country",
-            size='population',
-            size_max=40,
-            color_discrete_sequence=px.colors.qualitative.Set3, # Use Set3 qualitative palette
-            labels={
-                "tb_incidence_100k": "Incidence per 100k",
-                "tb_mortality_100k": "Mortality per 100k"
-            }
-        )
-        scatter_fig.update_traces(marker=dict(line=dict(width=1, color='DarkSlateGrey')))
-        st.plotly_chart(scatter_fig, use_container_width=True)
+        st.plotly_chart(incidence_mortality_scatter(df), use_container_width=True, key="incidence_mortality_scatter")
 
     # Add a scatter plot for TB Mortality vs. HIV in TB globally
     st.subheader("Mortality vs. HIV in TB (Global Scatter Plot)")
-    scatter_mortality_hiv = px.scatter(
-        df,
-        x='tb_mortality_100k',
-        y='hiv_in_tb_percent',
-        color='region',
-        hover_name='country',
-        title="TB Mortality vs. HIV in TB Percentage Globally",
-        size='population', # Size points by population
-        size_max=40,
-        color_discrete_sequence=px.colors.qualitative.Set3, # Use Set3 qualitative palette
-        labels={
-            "tb_mortality_100k": "Mortality per 100k",
-            "hiv_in_tb_percent": "HIV in TB (%)"
-        }
-    )
-    scatter_mortality_hiv.update_traces(marker=dict(line=dict(width=1, color='DarkSlateGrey')))
-    st.plotly_chart(scatter_mortality_hiv, use_container_width=True)
+    st.plotly_chart(mortality_hiv_scatter(df), use_container_width=True, key="mortality_hiv_scatter")
 
     # Add a scatter plot for Population vs. TB Incidence globally
     st.subheader("Population vs. TB Incidence (Global Scatter Plot)")
-    scatter_pop_incidence = px.scatter(
-        df,
-        x='population',
-        y='tb_incident_cases_total',
-        color='region',
-        hover_name='country',
-        title="Population vs. Total TB Incident Cases Globally",
-        size='tb_incidence_100k', # Size points by incidence rate
-        size_max=40,
-        color_discrete_sequence=px.colors.qualitative.Set3,
-        labels={
-            "population": "Population",
-            "tb_incident_cases_total": "Total Incident Cases",
-            "tb_incidence_100k": "Incidence per 100k"
-        }
-    )
-    scatter_pop_incidence.update_traces(marker=dict(line=dict(width=1, color='DarkSlateGrey')))
-    st.plotly_chart(scatter_pop_incidence, use_container_width=True)
+    st.plotly_chart(pop_incidence_scatter(df), use_container_width=True, key="pop_incidence_scatter")
+
 
-elif selected_page == "Country Comparison":
+@st.fragment
+def page_country_comparison():
     st.title("📊 Country Comparison")
     st.subheader("Key Metrics (Normalized)")
+    global_metrics = global_key_metrics(df)
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("Total Population", f"{round(df['population'].sum()/len(df['year'].unique())):,.0f}")
+        st.metric("Total Population", global_metrics['population'])
     with col2:
-        st.metric("Total TB Incidence", f"{round(df['tb_incident_cases_total'].sum()/len(df['year'].unique())):,.0f}")
+        st.metric("Total TB Incidence", global_metrics['incidence'])
     with col3:
-        # Calculate actual deaths for the country
-        country_deaths = (df['tb_mortality_100k'] * df['population'] / 100000).sum() / len(df['year'].unique())
-        st.metric("Total TB Deaths", f"{round(country_deaths):,.0f}")
+        st.metric("Total TB Deaths", global_metrics['deaths'])
     st.divider()
 
     with st.expander("What is the purpose of this page?"):
@@ -259,10 +733,13 @@ elif selected_page == "Country Comparison":
         """)
 
     st.subheader("Filter Options")
-    selected_year = st.selectbox("Select Year", sorted(df['year'].unique(), reverse=True))
-    selected_country = st.multiselect("Select Country", df['country'].unique(), default=["India", "Pakistan", "China"])
+    selected_year = st.selectbox("Select Year", years_desc(df))
+    selected_country = st.multiselect("Select Country", countries(df), default=["India", "Pakistan", "China"])
 
-    filtered_df = df[(df['year'] == selected_year) & (df['country'].isin(selected_country))]
+    # Slice the selected year via the cached groupby (hash lookup), then run
+    # isin over that ~200-row slice instead of the whole frame.
+    year_slice = grouped_by(df, 'year').get_group(selected_year)
+    filtered_df = year_slice[year_slice['country'].isin(selected_country)]
     if st.button("Show Filtered Data"):
         st.write(filtered_df)
 
@@ -285,7 +762,7 @@ elif selected_page == "Country Comparison":
         labels={"tb_incidence_100k": "Incidence per 100k", "country": "Country"}
     )
     fig1.update_layout(xaxis_tickangle=-45)
-    st.plotly_chart(fig1, use_container_width=True)
+    st.plotly_chart(fig1, use_container_width=True, key="fig1")
     st.divider()
 
     st.subheader("TB Mortality per Country")
@@ -299,17 +776,13 @@ elif selected_page == "Country Comparison":
         labels={"tb_mortality_100k": "Mortality per 100k", "country": "Country"}
     )
     fig2.update_layout(xaxis_tickangle=-45)
-    st.plotly_chart(fig2, use_container_width=True)
+    st.plotly_chart(fig2, use_container_width=True, key="fig2")
 
     # Add a stacked bar chart for total cases and deaths
     st.subheader(f"Total Incident Cases and Deaths ({selected_year})")
     if not filtered_df.empty:
-        # Calculate total cases and deaths for the selected year and countries
-        compare_case_death_df = filtered_df.copy()
-        compare_case_death_df['actual_deaths'] = compare_case_death_df['tb_mortality_100k'] * compare_case_death_df['population'] / 100000
-
         stacked_case_death = px.bar(
-            compare_case_death_df,
+            filtered_df,
             x='country',
             y=['tb_incident_cases_total', 'actual_deaths'],
             title=f"Total TB Incident Cases and Deaths in {selected_year}",
@@ -317,14 +790,14 @@ elif selected_page == "Country Comparison":
             barmode='stack',
             color_discrete_sequence=['#636EFA', '#EF553B'] # Use distinct colors
         )
-        st.plotly_chart(stacked_case_death, use_container_width=True)
+        st.plotly_chart(stacked_case_death, use_container_width=True, key="stacked_case_death")
     else:
         st.warning("No data available for the selected year and countries to compare total cases and deaths.")
 
     st.subheader("TB Incidence Trend for Selected Countries")
     if not filtered_df.empty:
         line_fig = px.line(
-            df[df['country'].isin(selected_country)],
+            countries_slice(df, tuple(selected_country)),
             x='year',
             y='tb_incidence_100k',
             color='country',
@@ -339,15 +812,11 @@ elif selected_page == "Country Comparison":
                 dtick=5
             )
         )
-        st.plotly_chart(line_fig, use_container_width=True)
+        st.plotly_chart(line_fig, use_container_width=True, key="line_fig")
     st.divider()
 
     st.subheader("TB Incidence Heatmap")
-    heatmap_data = df[df['country'].isin(selected_country)].pivot_table(
-        index='country', 
-        columns='year', 
-        values='tb_incidence_100k'
-    )
+    heatmap_data = country_year_matrix(df, tuple(selected_country))
     heatmap_fig = px.imshow(
         heatmap_data,
         labels=dict(x="Year", y="Country", color="Incidence per 100k"),
@@ -355,38 +824,40 @@ elif selected_page == "Country Comparison":
         color_continuous_scale="Reds",
         aspect="auto"
     )
-    st.plotly_chart(heatmap_fig, use_container_width=True)
+    st.plotly_chart(heatmap_fig, use_container_width=True, key="heatmap_fig")
 
-elif selected_page == "Trends Over Time":
+
+@st.fragment
+def page_trends_over_time():
     st.title("📈 Trends Over Time")
     # Use a single selectbox for the entire page
     trend_country = st.selectbox(
         "Select Country",
-        df['country'].unique(),
-        index=df['country'].tolist().index('Afghanistan'),
+        countries(df),
+        index=countries(df).index('Afghanistan'),
         key="trends_country_selection"
     )
-    trend_df = df[df['country'] == trend_country]
+    trend_df = grouped_by(df, 'country').get_group(trend_country)
+    trend_figs = trend_page_figs(df, trend_country)
+    trend_summary = country_summary(df).loc[trend_country]
     st.subheader(f"Key Metrics for {trend_country}")
     col1, col2, col3 = st.columns(3)
     with col1:
         st.metric(
             "Total Population",
-            f"{round(trend_df['population'].sum()/len(trend_df['year'].unique())):,.0f}",
+            f"{round(trend_summary['pop_sum']/trend_summary['n_years']):,.0f}",
             help="Normalized to a single year (data spans multiple years) to avoid unrealistic totals."
         )
     with col2:
         st.metric(
             "Total TB Incidence",
-            f"{round(trend_df['tb_incident_cases_total'].sum()/len(trend_df['year'].unique())):,.0f}",
+            f"{round(trend_summary['cases_sum']/trend_summary['n_years']):,.0f}",
             help="Normalized to a single year (data spans multiple years) to avoid unrealistic totals."
         )
     with col3:
-        # Calculate actual deaths for the country
-        country_deaths = (trend_df['tb_mortality_100k'] * trend_df['population'] / 100000).sum() / len(trend_df['year'].unique())
         st.metric(
             "Total TB Deaths",
-            f"{round(country_deaths):,.0f}",
+            f"{round(trend_summary['deaths_sum']/trend_summary['n_years']):,.0f}",
             help="Normalized to a single year (data spans multiple years) to avoid unrealistic totals."
         )
     st.divider()
@@ -406,117 +877,57 @@ elif selected_page == "Trends Over Time":
         st.subheader("Incidence Trends")
         col1, col2, col3 = st.columns(3)
         with col2:
-            st.metric("Average Incidence Rate", f"{trend_df['tb_incidence_100k'].mean():.2f} per 100k")
-        fig_incidence = px.line(
-            trend_df,
-            x='year',
-            y='tb_incidence_100k',
-            title=f"TB Incidence Trend in {trend_country}",
-            color_discrete_sequence=["#636EFA"]
-        )
-        st.plotly_chart(fig_incidence)
+            st.metric("Average Incidence Rate", f"{trend_summary['incidence_mean']:.2f} per 100k")
+        st.plotly_chart(trend_figs['incidence_line'], key="trend_incidence_line")
         
         st.subheader("Yearly Incidence Distribution")
-        bar_fig = px.bar(
-            trend_df,
-            x='year',
-            y='tb_incidence_100k',
-            title=f"Yearly TB Incidence in {trend_country}",
-            color_discrete_sequence=["#636EFA"]
-        )
-        st.plotly_chart(bar_fig)
+        st.plotly_chart(trend_figs['incidence_bar'], key="trend_incidence_bar")
 
         # Add an Area Chart for Total Incident Cases over Time
         st.subheader("Total Incident Cases Over Time")
-        area_fig_incidence = px.area(
-            trend_df,
-            x='year',
-            y='tb_incident_cases_total',
-            title=f"Total TB Incident Cases Over Time in {trend_country}",
-            color_discrete_sequence=["#00CC96"],
-            labels={'tb_incident_cases_total': 'Total Cases'}
-        )
-        st.plotly_chart(area_fig_incidence)
+        st.plotly_chart(trend_figs['incidence_area'], key="trend_incidence_area")
 
     with tab2:
         st.subheader("Mortality Trends")
         col1, col2, col3 = st.columns(3)
         with col2:
-            st.metric("Average Mortality Rate", f"{trend_df['tb_mortality_100k'].mean():.2f} per 100k")
-        fig_mortality = px.line(
-            trend_df,
-            x='year',
-            y='tb_mortality_100k',
-            title=f"TB Mortality Trend in {trend_country}",
-            color_discrete_sequence=["#EF553B"]
-        )
-        st.plotly_chart(fig_mortality)
+            st.metric("Average Mortality Rate", f"{trend_summary['mortality_mean']:.2f} per 100k")
+        st.plotly_chart(trend_figs['mortality_line'], key="trend_mortality_line")
 
         st.subheader("Mortality vs. Incidence (Scatter Plot)")
-        scatter_fig = px.scatter(
-            trend_df,
-            x='tb_incidence_100k',
-            y='tb_mortality_100k',
-            title=f"Mortality vs. Incidence in {trend_country}",
-            labels={"x": "Incidence per 100k", "y": "Mortality per 100k"},
-            color_discrete_sequence=["#EF553B"]
-        )
-        st.plotly_chart(scatter_fig)
+        st.plotly_chart(trend_figs['mortality_scatter'], key="trend_mortality_scatter")
 
         st.subheader("Detection Rate Trend")
-        fig_detection = px.line(
-            trend_df,
-            x='year',
-            y='detection_rate',
-            title=f"TB Detection Rate Trend in {trend_country}",
-            color_discrete_sequence=["#00CC96"]
-        )
-        st.plotly_chart(fig_detection)
+        st.plotly_chart(trend_figs['detection_line'], key="trend_detection_line")
 
         st.subheader("HIV in TB Trend")
-        fig_hiv = px.line(
-            trend_df,
-            x='year',
-            y='hiv_in_tb_percent',
-            title=f"HIV Percentage in TB Patients Trend in {trend_country}",
-            color_discrete_sequence=["#FFA15A"]
-        )
-        st.plotly_chart(fig_hiv)
+        st.plotly_chart(trend_figs['hiv_line'], key="trend_hiv_line")
 
     st.subheader("Incidence vs. Mortality Over Time (Dual Axis Plot)")
     if not trend_df.empty:
-        dual_axis_fig = px.line(
-            trend_df,
-            x='year',
-            y=['tb_incidence_100k', 'tb_mortality_100k'],
-            title=f"Incidence vs. Mortality Over Time in {trend_country}",
-            labels={"value": "Rate per 100k", "variable": "Metric"}
-        )
-        st.plotly_chart(dual_axis_fig)
+        dual_axis_fig = pio.from_json(incidence_mortality_fig_json(df, trend_country))
+        st.plotly_chart(dual_axis_fig, key="dual_axis_fig")
     st.divider()
 
     st.subheader("Incidence Rate Distribution (Histogram)")
-    hist_fig = px.histogram(
-        trend_df,
-        x='tb_incidence_100k',
-        nbins=20,
-        title=f"Distribution of TB Incidence Rates in {trend_country}"
-    )
-    st.plotly_chart(hist_fig)
+    st.plotly_chart(trend_figs['incidence_hist'], key="trend_incidence_hist")
+
 
-elif selected_page == "Regional Analysis":
+@st.fragment
+def page_regional_analysis():
     st.title("🌎 Regional Analysis")
-    selected_region = st.selectbox("Select Region", df['region'].unique())
-    regional_df = df[df['region'] == selected_region]
+    selected_region = st.selectbox("Select Region", regions(df))
+    regional_df = grouped_by(df, 'region').get_group(selected_region)
     st.subheader(f"Key Metrics for {selected_region} (Normalized)")
+    global_metrics = global_key_metrics(df)
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("Total Population", f"{round(df['population'].sum()/len(df['year'].unique())):,.0f}")
+        st.metric("Total Population", global_metrics['population'])
     with col2:
-        st.metric("Total TB Incidence", f"{round(df['tb_incident_cases_total'].sum()/len(df['year'].unique())):,.0f}")
+        st.metric("Total TB Incidence", global_metrics['incidence'])
     with col3:
         # Calculate actual deaths for the region
-        region_deaths = (regional_df['tb_mortality_100k'] * regional_df['population'] / 100000).sum() / len(df['year'].unique())
+        region_deaths = regional_df['actual_deaths'].sum() / len(years_desc(df))
         st.metric("Total TB Deaths", f"{round(region_deaths):,.0f}")
     st.divider()
 
@@ -530,30 +941,26 @@ elif selected_page == "Regional Analysis":
         """)
 
     st.subheader(f"TB Prevalence in {selected_region}")
-    region_fig = px.bar(
+    region_fig = single_trace_bar(
         regional_df,
         x='country',
         y='tb_incidence_100k',
-        color='country',
-        title=f"TB Prevalence in {selected_region}",
-        color_discrete_sequence=px.colors.sequential.Aggrnyl
+        colorscale='Aggrnyl',
+        title=f"TB Prevalence in {selected_region}"
     )
-    st.plotly_chart(region_fig)
+    st.plotly_chart(region_fig, key="region_fig")
 
     st.subheader(f"TB Mortality in {selected_region}")
-    region_mortality_fig = px.bar(
+    region_mortality_fig = single_trace_bar(
         regional_df,
         x='country',
         y='tb_mortality_100k',
-        color='country',
-        title=f"TB Mortality in {selected_region}",
-        color_discrete_sequence=px.colors.sequential.OrRd # Keep OrRd for mortality for distinction
+        colorscale='OrRd', # Keep OrRd for mortality for distinction
+        title=f"TB Mortality in {selected_region}"
     )
-    st.plotly_chart(region_mortality_fig)
+    st.plotly_chart(region_mortality_fig, key="region_mortality_fig")
 
     st.subheader(f"TB Deaths by Country in {selected_region} (Pie Chart)")
-    # Calculate actual deaths for each country
-    regional_df['actual_deaths'] = regional_df['tb_mortality_100k'] * regional_df['population'] / 100000
     pie_deaths = px.pie(
         regional_df,
         names='country',
@@ -561,35 +968,36 @@ elif selected_page == "Regional Analysis":
         title=f"TB Deaths Distribution in {selected_region}",
         color_discrete_sequence=px.colors.qualitative.Pastel # Use Pastel qualitative palette
     )
-    st.plotly_chart(pie_deaths)
+    st.plotly_chart(pie_deaths, key="pie_deaths")
     st.divider()
 
     st.subheader(f"TB Incidence Distribution in {selected_region} (Box Plot)")
     box_incidence = px.box(
         regional_df,
         y='tb_incidence_100k',
-        points="all",
+        points="outliers",
         title=f"TB Incidence per 100k in {selected_region} (Box Plot)",
         color_discrete_sequence=px.colors.qualitative.Plotly # Use Plotly qualitative palette
     )
-    st.plotly_chart(box_incidence)
+    st.plotly_chart(box_incidence, key="box_incidence")
 
     st.subheader(f"Average TB Incidence Trend in {selected_region}")
-    # Calculate average incidence per year for the selected region
-    regional_yearly_avg = regional_df.groupby('year')['tb_incidence_100k'].mean().reset_index()
+    # Average incidence per year for the selected region, cached per region
+    regional_yearly_avg = region_yearly_avg(df, selected_region)
     region_trend_fig = px.line(
-        regional_yearly_avg,
+        downsample(regional_yearly_avg, 'year', 'tb_incidence_100k'),
         x='year',
         y='tb_incidence_100k',
         title=f"Average TB Incidence Trend in {selected_region}",
         labels={"tb_incidence_100k": "Average Incidence per 100k", "year": "Year"}
     )
-    st.plotly_chart(region_trend_fig)
+    st.plotly_chart(region_trend_fig, key="region_trend_fig")
 
     # Add a scatter plot to explore the relationship between Population and TB Mortality per 100k
     st.subheader(f"Population vs. TB Mortality in {selected_region} (Scatter Plot)")
     scatter_pop_mortality_region = px.scatter(
         regional_df,
+        render_mode="webgl",
         x='population',
         y='tb_mortality_100k',
         color='country',
@@ -605,20 +1013,24 @@ elif selected_page == "Regional Analysis":
         }
     )
     scatter_pop_mortality_region.update_traces(marker=dict(line=dict(width=1, color='DarkSlateGrey')))
-    st.plotly_chart(scatter_pop_mortality_region, use_container_width=True)
+    scatter_pop_mortality_region.update_layout(transition_duration=0)
+    st.plotly_chart(scatter_pop_mortality_region, use_container_width=True, key="scatter_pop_mortality_region")
 
-elif selected_page == "Country Profiles":
+
+@st.fragment
+def page_country_profiles():
     st.title("🌍 Country Profiles")
 
     # Use a single selectbox for the entire Country Profiles page
     selected_country_profile = st.selectbox(
         "Select a Country",
-        df['country'].unique(),
-        index=df['country'].tolist().index('Afghanistan'),
+        countries(df),
+        index=countries(df).index('Afghanistan'),
         key="country_profile_selection"
     )
     # Filter the main dataframe for the selected country
-    country_df = df[df['country'] == selected_country_profile]
+    country_df = grouped_by(df, 'country').get_group(selected_country_profile)
+    profile_summary = country_summary(df).loc[selected_country_profile]
 
     tab1, tab2 = st.tabs(["Detailed Statistics", "Trends"])
 
@@ -640,52 +1052,54 @@ elif selected_page == "Country Profiles":
         with col1:
             st.metric(
                 "Total Population",
-                f"{round(country_df['population'].sum()/len(country_df['year'].unique())):,.0f}",
+                f"{round(profile_summary['pop_sum']/profile_summary['n_years']):,.0f}",
                 help="Normalized to a single year (data spans multiple years) to avoid unrealistic totals."
             )
         with col2:
-            st.metric("Total TB Incidence", f"{round(country_df['tb_incident_cases_total'].sum()/len(country_df['year'].unique())):,.0f}", help="Normalized to a single year (data spans multiple years) to avoid unrealistic totals.")
+            st.metric("Total TB Incidence", f"{round(profile_summary['cases_sum']/profile_summary['n_years']):,.0f}", help="Normalized to a single year (data spans multiple years) to avoid unrealistic totals.")
         with col3:
-            # Calculate actual deaths for the country
-            country_deaths = (country_df['tb_mortality_100k'] * country_df['population'] / 100000).sum() / len(country_df['year'].unique())
-            st.metric("Total TB Deaths", f"{round(country_deaths):,.0f}", help="Normalized to a single year (data spans multiple years) to avoid unrealistic totals.")
+            st.metric("Total TB Deaths", f"{round(profile_summary['deaths_sum']/profile_summary['n_years']):,.0f}", help="Normalized to a single year (data spans multiple years) to avoid unrealistic totals.")
         st.divider()
 
         st.subheader(f"Detailed Statistics for {selected_country_profile}")
         st.write(country_df)
         st.subheader("Proportion of TB Metrics (Normalized)")
-        pie_data = {
-            "Metric": ["Incidence", "Deaths"],
-            "Value": [
-                country_df['tb_incident_cases_total'].sum() / len(country_df['year'].unique()),
-                (country_df['tb_mortality_100k'] * country_df['population'] / 100000).sum() / len(country_df['year'].unique())
-            ]
-        }
-        pie_fig = px.pie(
-            pie_data,
-            names="Metric",
-            values="Value",
-            title=f"Proportion of TB Metrics in {selected_country_profile}",
-            color_discrete_sequence=px.colors.qualitative.Pastel
-        )
-        st.plotly_chart(pie_fig)
+        # Two precomputed scalars feed a go.Pie directly — no throwaway
+        # DataFrame for Plotly Express to introspect.
+        pie_fig = go.Figure(go.Pie(
+            labels=["Incidence", "Deaths"],
+            values=[
+                profile_summary['cases_sum'] / profile_summary['n_years'],
+                profile_summary['deaths_sum'] / profile_summary['n_years']
+            ],
+            marker_colors=px.colors.qualitative.Pastel
+        ))
+        pie_fig.update_layout(title=f"Proportion of TB Metrics in {selected_country_profile}")
+        st.plotly_chart(pie_fig, key="pie_fig")
 
         st.subheader("Total TB Metrics (Bar Chart)")
         bar_totals = px.bar(
             x=["Incidence", "Deaths"],
             y=[
-                country_df['tb_incident_cases_total'].sum() / len(country_df['year'].unique()),
-                (country_df['tb_mortality_100k'] * country_df['population'] / 100000).sum() / len(country_df['year'].unique())
+                profile_summary['cases_sum'] / profile_summary['n_years'],
+                profile_summary['deaths_sum'] / profile_summary['n_years']
             ],
             labels={"x": "Metric", "y": "Total"},
             title=f"Total TB Metrics for {selected_country_profile}"
         )
-        st.plotly_chart(bar_totals)
+        st.plotly_chart(bar_totals, key="bar_totals")
 
         # Add a bar chart for average key metrics across all years
         st.subheader(f"Average Key Metrics for {selected_country_profile} (All Years)")
-        average_metrics = country_df[['tb_incidence_100k', 'tb_mortality_100k', 'hiv_in_tb_percent', 'detection_rate']].mean().reset_index()
-        average_metrics.columns = ['Metric', 'Average Value']
+        average_metrics = pd.DataFrame({
+            'Metric': ['tb_incidence_100k', 'tb_mortality_100k', 'hiv_in_tb_percent', 'detection_rate'],
+            'Average Value': [
+                profile_summary['incidence_mean'],
+                profile_summary['mortality_mean'],
+                profile_summary['hiv_mean'],
+                profile_summary['detection_mean']
+            ]
+        })
 
         average_metrics_bar = px.bar(
             average_metrics,
@@ -696,7 +1110,7 @@ elif selected_page == "Country Profiles":
             color='Metric',
             color_discrete_sequence=px.colors.qualitative.Set2
         )
-        st.plotly_chart(average_metrics_bar, use_container_width=True)
+        st.plotly_chart(average_metrics_bar, use_container_width=True, key="average_metrics_bar")
 
     with tab2:
         # Remove duplicate selectbox, using the one from the top of the page
@@ -716,57 +1130,67 @@ elif selected_page == "Country Profiles":
         with col1:
             st.metric(
                 "Total Population",
-                f"{round(country_df['population'].sum()/len(country_df['year'].unique())):,.0f}",
+                f"{round(profile_summary['pop_sum']/profile_summary['n_years']):,.0f}",
                 help="Normalized to a single year (data spans multiple years) to avoid unrealistic totals."
             )
         with col2:
-            st.metric("Total TB Incidence", f"{round(country_df['tb_incident_cases_total'].sum()/len(country_df['year'].unique())):,.0f}", help="Normalized to a single year (data spans multiple years) to avoid unrealistic totals.")
+            st.metric("Total TB Incidence", f"{round(profile_summary['cases_sum']/profile_summary['n_years']):,.0f}", help="Normalized to a single year (data spans multiple years) to avoid unrealistic totals.")
         with col3:
-            # Calculate actual deaths for the country
-            country_deaths = (country_df['tb_mortality_100k'] * country_df['population'] / 100000).sum() / len(country_df['year'].unique())
-            st.metric("Total TB Deaths", f"{round(country_deaths):,.0f}", help="Normalized to a single year (data spans multiple years) to avoid unrealistic totals.")
+            st.metric("Total TB Deaths", f"{round(profile_summary['deaths_sum']/profile_summary['n_years']):,.0f}", help="Normalized to a single year (data spans multiple years) to avoid unrealistic totals.")
         st.divider()
 
         st.subheader(f"Trends for {selected_country_profile}")
-        fig_trends = px.line(
-            country_df,
-            x='year',
-            y=['tb_incidence_100k', 'tb_mortality_100k', 'tb_incident_cases_total'],
-            title=f"Trends in TB Statistics for {selected_country_profile}",
-            labels={"value": "Rate per 100k", "variable": "Metric"},
-            color_discrete_sequence=px.colors.qualitative.Set1
-        )
-        st.plotly_chart(fig_trends)
+        # Remember the last-rendered trend figures in session state so reruns
+        # triggered by unrelated widgets skip rebuilding them entirely.
+        if st.session_state.get('profile_trends_country') != selected_country_profile:
+            # Melt the three metric columns once and feed the tidy frame to
+            # both figures, instead of letting each px call re-melt internally.
+            profile_tidy = country_df[
+                ['year', 'tb_incidence_100k', 'tb_mortality_100k', 'tb_incident_cases_total']
+            ].melt('year', var_name='Metric', value_name='Rate')
+            st.session_state['profile_trends_fig'] = px.line(
+                profile_tidy,
+                x='year',
+                y='Rate',
+                color='Metric',
+                title=f"Trends in TB Statistics for {selected_country_profile}",
+                labels={"Rate": "Rate per 100k"},
+                color_discrete_sequence=px.colors.qualitative.Set1
+            )
+            st.session_state['profile_yearly_fig'] = px.bar(
+                profile_tidy,
+                x='year',
+                y='Rate',
+                color='Metric',
+                title=f"Yearly Trends in TB Metrics for {selected_country_profile}",
+                labels={"Rate": "Rate per 100k"},
+                barmode='group',
+                color_discrete_sequence=px.colors.qualitative.Set2
+            )
+            st.session_state['profile_trends_country'] = selected_country_profile
+        st.plotly_chart(st.session_state['profile_trends_fig'], key="profile_trends_fig")
         col1, col2, col3 = st.columns(3)
         with col1:
-            st.metric("Average Prevalence Rate", f"{country_df['tb_incidence_100k'].mean():.2f} per 100k")
+            st.metric("Average Prevalence Rate", f"{profile_summary['incidence_mean']:.2f} per 100k")
         with col2:
-            st.metric("Average Mortality Rate", f"{country_df['tb_mortality_100k'].mean():.2f} per 100k")
+            st.metric("Average Mortality Rate", f"{profile_summary['mortality_mean']:.2f} per 100k")
         with col3:
-            st.metric("Average Incidence Rate", f"{country_df['tb_incident_cases_total'].mean():.2f} per 100k")
+            st.metric("Average Incidence Rate", f"{profile_summary['cases_mean']:.2f} per 100k")
 
         st.subheader("Yearly Trends")
-        bar_trends = px.bar(
-            country_df,
-            x='year',
-            y=['tb_incidence_100k', 'tb_mortality_100k', 'tb_incident_cases_total'],
-            title=f"Yearly Trends in TB Metrics for {selected_country_profile}",
-            labels={"value": "Rate per 100k", "variable": "Metric"},
-            barmode='group',
-            color_discrete_sequence=px.colors.qualitative.Set2
-        )
-        st.plotly_chart(bar_trends)
+        st.plotly_chart(st.session_state['profile_yearly_fig'], key="profile_yearly_fig")
 
         st.subheader("Prevalence vs. Incidence Over Years (Scatter Plot)")
         scatter_profile = px.scatter(
             country_df,
+            render_mode="webgl",
             x='tb_incidence_100k',
             y='tb_incident_cases_total',
             color='year',
             title=f"Prevalence vs. Incidence Over Years in {selected_country_profile}",
             labels={"x": "Prevalence per 100k", "y": "Incidence per 100k"}
         )
-        st.plotly_chart(scatter_profile)
+        st.plotly_chart(scatter_profile, key="scatter_profile")
 
         st.subheader("Detection Rate Trend")
         fig_detection_profile = px.line(
@@ -776,7 +1200,7 @@ elif selected_page == "Country Profiles":
             title=f"TB Detection Rate Trend in {selected_country_profile}",
             color_discrete_sequence=["#00CC96"]
         )
-        st.plotly_chart(fig_detection_profile)
+        st.plotly_chart(fig_detection_profile, key="fig_detection_profile")
 
         st.subheader("HIV in TB Trend")
         fig_hiv_profile = px.line(
@@ -786,12 +1210,13 @@ elif selected_page == "Country Profiles":
             title=f"HIV Percentage in TB Patients Trend in {selected_country_profile}",
             color_discrete_sequence=["#FFA15A"]
         )
-        st.plotly_chart(fig_hiv_profile)
+        st.plotly_chart(fig_hiv_profile, key="fig_hiv_profile")
 
         # Add a scatter plot showing HIV in TB Percentage vs. Detection Rate over years
         st.subheader("HIV in TB vs. Detection Rate Over Years")
         scatter_hiv_detection = px.scatter(
             country_df,
+            render_mode="webgl",
             x='detection_rate',
             y='hiv_in_tb_percent',
             color='year',
@@ -802,9 +1227,11 @@ elif selected_page == "Country Profiles":
             },
             hover_name='year'
         )
-        st.plotly_chart(scatter_hiv_detection, use_container_width=True)
+        st.plotly_chart(scatter_hiv_detection, use_container_width=True, key="scatter_hiv_detection")
 
-elif selected_page == "Interactive Data Explorer":
+
+@st.fragment
+def page_data_explorer():
     st.title("🔍 Interactive Data Explorer")
     with st.expander("What is the purpose of this page?"):
         st.write("""
@@ -818,14 +1245,19 @@ elif selected_page == "Interactive Data Explorer":
     # Add more filtering options
     col1, col2 = st.columns(2)
     with col1:
-        selected_region = st.multiselect("Select Region", df['region'].unique(), default=df['region'].unique())
+        selected_region = st.multiselect("Select Region", regions(df), default=regions(df))
     with col2:
-        selected_countries_explorer = st.multiselect("Select Countries", df['country'].unique(), default=[])
+        selected_countries_explorer = st.multiselect("Select Countries", countries(df), default=[])
 
-    selected_years = st.slider("Select Year Range", int(df['year'].min()), int(df['year'].max()), (int(df['year'].min()), int(df['year'].max())))
+    selected_years = st.slider("Select Year Range", min(years_desc(df)), max(years_desc(df)), (min(years_desc(df)), max(years_desc(df))))
 
-    # Apply initial filters
-    explorer_df = df[(df['region'].isin(selected_region)) & (df['year'].between(*selected_years))]
+    # Apply initial filters via the precomputed region bitmask
+    region_index = df['region'].cat.categories
+    sel_bits = np.uint64(0)
+    for r in selected_region:
+        sel_bits |= np.uint64(1) << np.uint64(region_index.get_loc(r))
+    region_mask = (region_bits(df) & sel_bits) != 0
+    explorer_df = df[region_mask & df['year'].between(*selected_years).to_numpy()]
 
     # Apply country filter if any countries are selected
     if selected_countries_explorer:
@@ -840,44 +1272,59 @@ elif selected_page == "Interactive Data Explorer":
         """)
 
     st.subheader("Custom Query Results")
-    query = st.text_area("Enter a custom query (e.g., `tb_incidence_100k > 100`). Available columns: " + ", ".join(explorer_df.columns))
+    # A form batches edits: the query (and its charts) only re-execute on an
+    # explicit submit, not on every blur of the text area.
+    with st.form("custom_query_form"):
+        query = st.text_area("Enter a custom query (e.g., `tb_incidence_100k > 100`). Available columns: " + ", ".join(explorer_df.columns))
+        st.form_submit_button("Run Query")
     if query:
         try:
-            if any(keyword in query.lower() for keyword in ["import", "exec", "eval", "os.", "sys."]):
-                raise ValueError("Invalid query: Potentially unsafe operations detected.")
-
-            query_results = explorer_df.query(query)
-            st.write(query_results)
+            validate_query(query)
+            query_results = run_explorer_query(explorer_df, query)
+            st.dataframe(query_results, use_container_width=True, height=400)
 
             if not query_results.empty:
                 st.markdown("### TB Prevalence by Region")
                 region_fig = px.bar(
-                    query_results.groupby('region').sum().reset_index(),
+                    query_results.groupby('region', sort=False, observed=True).agg({'tb_incident_cases_total': 'sum'}).reset_index(),
                     x='region',
                     y='tb_incident_cases_total',
                     title="TB Prevalence by Region",
                     color_discrete_sequence=px.colors.sequential.Viridis
                 )
-                st.plotly_chart(region_fig)
+                st.plotly_chart(region_fig, key="region_fig_2")
 
                 st.markdown("### TB Incidence vs. Mortality")
+                bubble_df = stratified_sample(query_results)
                 bubble_fig = px.scatter(
-                    query_results,
+                    bubble_df,
+                    render_mode="webgl",
                     x='tb_incidence_100k',
                     y='tb_mortality_100k',
-                    size='population',
+                    size=bubble_sizes(bubble_df['population']),
                     color='region',
                     hover_name='country',
                     title="TB Incidence vs. Mortality",
                     size_max=60,
                     color_discrete_sequence=px.colors.qualitative.Set2
                 )
-                st.plotly_chart(bubble_fig)
+                bubble_fig.update_layout(transition_duration=0)
+                st.plotly_chart(bubble_fig, key="bubble_fig")
 
                 st.markdown("### Stacked Bar Chart for Regional TB Statistics")
-                # Calculate actual deaths for each region
-                query_results['actual_deaths'] = query_results['tb_mortality_100k'] * query_results['population'] / 100000
-                stacked_data = query_results.groupby('region')[['tb_incident_cases_total', 'actual_deaths']].sum().reset_index()
+                # Region totals via bincount over the category codes: one
+                # tight C pass per metric instead of a hash-based groupby,
+                # which matters when the query leaves only a handful of rows.
+                codes = query_results['region'].cat.codes.to_numpy()
+                region_labels = query_results['region'].cat.categories
+                actual_deaths = query_results['actual_deaths'].to_numpy(dtype=np.float64)
+                cases = query_results['tb_incident_cases_total'].to_numpy(dtype=np.float64)
+                counts = np.bincount(codes, minlength=len(region_labels))
+                stacked_data = pd.DataFrame({
+                    'region': region_labels,
+                    'tb_incident_cases_total': np.bincount(codes, weights=np.nan_to_num(cases), minlength=len(region_labels)),
+                    'actual_deaths': np.bincount(codes, weights=np.nan_to_num(actual_deaths), minlength=len(region_labels)),
+                })[counts > 0]
                 stacked_fig = px.bar(
                     stacked_data,
                     x='region',
@@ -886,7 +1333,7 @@ elif selected_page == "Interactive Data Explorer":
                     labels={"value": "Count", "variable": "Metric"},
                     color_discrete_sequence=px.colors.qualitative.Pastel
                 )
-                st.plotly_chart(stacked_fig)
+                st.plotly_chart(stacked_fig, key="stacked_fig")
             else:
                 st.warning("No data matches the query. Please adjust your query and try again.")
         except Exception as e:
@@ -906,12 +1353,12 @@ elif selected_page == "Interactive Data Explorer":
                 y_axis = st.selectbox("Select Y-axis", all_columns)
 
             if plot_type == "scatter":
-                custom_fig = px.scatter(explorer_df, x=x_axis, y=y_axis, hover_name='country', title=f"{y_axis} vs. {x_axis}")
+                custom_fig = px.scatter(explorer_df, x=x_axis, y=y_axis, hover_name='country', title=f"{y_axis} vs. {x_axis}", render_mode="webgl")
             elif plot_type == "line":
                 custom_fig = px.line(explorer_df, x=x_axis, y=y_axis, color='country', title=f"{y_axis} over {x_axis}")
             elif plot_type == "bar":
                  custom_fig = px.bar(explorer_df, x=x_axis, y=y_axis, title=f"{y_axis} by {x_axis}")
-            st.plotly_chart(custom_fig, use_container_width=True)
+            st.plotly_chart(custom_fig, use_container_width=True, key="custom_fig")
 
         elif plot_type in ["histogram", "box", "violin"]:
             selected_column = st.selectbox("Select Column", all_columns)
@@ -920,14 +1367,14 @@ elif selected_page == "Interactive Data Explorer":
             elif plot_type == "box":
                 custom_fig = px.box(explorer_df, y=selected_column, title=f"Distribution of {selected_column} (Box Plot)")
             elif plot_type == "violin":
-                 custom_fig = px.violin(explorer_df, y=selected_column, box=True, points="all", title=f"Distribution of {selected_column} (Violin Plot)")
-            st.plotly_chart(custom_fig, use_container_width=True)
+                 custom_fig = px.violin(explorer_df, y=selected_column, box=True, points="outliers", title=f"Distribution of {selected_column} (Violin Plot)")
+            st.plotly_chart(custom_fig, use_container_width=True, key="custom_fig_2")
     else:
         st.warning("No data available for plotting. Please adjust your filters or query.")
 
     st.subheader("Filtered Data Table")
     if st.button("Show Filtered Data"):
-        st.write(explorer_df)
+        st.dataframe(explorer_df, use_container_width=True, height=400)
 
     # Bring back the deleted plots
     st.subheader("TB Prevalence by Region (Violin Plot)")
@@ -936,24 +1383,26 @@ elif selected_page == "Interactive Data Explorer":
         x='region',
         y='tb_incidence_100k',
         box=True,
-        points="all",
+        points="outliers",
         title="TB Prevalence by Region (Violin Plot)"
     )
-    st.plotly_chart(violin_fig)
+    st.plotly_chart(violin_fig, key="violin_fig")
     st.divider()
 
     st.subheader("Average TB Prevalence Over Years (Filtered)")
     if not explorer_df.empty:
         avg_year = explorer_df.groupby('year')['tb_incidence_100k'].mean().reset_index()
         avg_line = px.line(
-            avg_year,
+            downsample(avg_year, 'year', 'tb_incidence_100k'),
             x='year',
             y='tb_incidence_100k',
             title="Average TB Prevalence Over Years (Filtered)"
         )
-        st.plotly_chart(avg_line)
+        st.plotly_chart(avg_line, key="avg_line")
+
 
-elif selected_page == "Country Similarity Analysis":
+@st.fragment
+def page_country_similarity():
     st.title("🌎 Country Similarity Analysis")
     st.markdown("""
     This page allows you to explore the similarity between countries based on their TB profiles. 
@@ -964,32 +1413,11 @@ elif selected_page == "Country Similarity Analysis":
     st.subheader("Country Similarity Analysis")
     # The markdown explanation for similarity is updated above in the main page markdown.
 
-    # Select relevant numerical features for similarity calculation
-    similarity_cols = [
-        'tb_incidence_100k',
-        'tb_mortality_100k',
-        'hiv_in_tb_percent',
-        'detection_rate',
-    ]
-
-    # Prepare data for similarity - use data from the most recent year
-    latest_year = df['year'].max()
-    country_features = df[df['year'] == latest_year][['country'] + similarity_cols].set_index('country')
-
-    # Drop countries with any NaN values in the selected features
-    country_features = country_features.dropna()
-
-    if not country_features.empty:
-        # Calculate cosine similarity matrix
-        cosine_sim_matrix = cosine_similarity(country_features)
-
-        # Convert to a pandas DataFrame for easier handling
-        cosine_sim_df = pd.DataFrame(
-            cosine_sim_matrix,
-            index=country_features.index,
-            columns=country_features.index
-        )
+    # Similarity over the most recent year's profiles, precomputed and cached
+    latest_year, cosine_sim_df = similarity_matrix(df)
+    similarity_cols = SIMILARITY_COLS
 
+    if not cosine_sim_df.empty:
         st.write(f"Select a country to find others with similar TB profiles based on metrics from the most recent year ({latest_year}).")
 
         # Dropdown to select a country
@@ -1013,7 +1441,8 @@ elif selected_page == "Country Similarity Analysis":
             
             # Get data for the selected country and the top similar countries for the latest year
             compare_countries = [selected_country_similarity] + sorted_similar_countries.head(num_similar_countries).index.tolist()
-            compare_df = df[(df['year'] == latest_year) & (df['country'].isin(compare_countries))]
+            year_slice = grouped_by(df, 'year').get_group(latest_year)
+            compare_df = year_slice[year_slice['country'].isin(compare_countries)]
 
             if not compare_df.empty:
                 # Display similar countries in a formatted way (Bar chart for scores)
@@ -1030,10 +1459,15 @@ elif selected_page == "Country Similarity Analysis":
                     title=f"Cosine Similarity Scores for Countries Most Similar to {selected_country_similarity}",
                     labels={'Cosine Similarity Score': 'Score'}
                 )
-                st.plotly_chart(similarity_bar_chart, use_container_width=True)
+                st.plotly_chart(similarity_bar_chart, use_container_width=True, key="similarity_bar_chart")
 
-                # Melt the DataFrame to long format for easy plotting (Define compare_melted here)
-                compare_melted = compare_df.melt(id_vars=['country', 'year'], value_vars=similarity_cols, var_name='Metric', value_name='Value')
+                # Long format for the grouped bar and radar charts, assembled
+                # in one numpy pass instead of a pandas melt copy.
+                compare_melted = pd.DataFrame({
+                    'country': np.repeat(compare_df['country'].to_numpy(), len(similarity_cols)),
+                    'Metric': np.tile(similarity_cols, len(compare_df)),
+                    'Value': compare_df[similarity_cols].to_numpy().reshape(-1),
+                })
 
                 # Add visual comparison: Bar chart comparing metrics of selected country and similar countries
                 st.subheader("Metric Comparison with Similar Countries")
@@ -1048,7 +1482,7 @@ elif selected_page == "Country Similarity Analysis":
                     title=f"Comparison of TB Metrics for {selected_country_similarity} and Similar Countries ({latest_year})",
                     labels={'Value': 'Metric Value'}
                 )
-                st.plotly_chart(comparison_bar, use_container_width=True)
+                st.plotly_chart(comparison_bar, use_container_width=True, key="comparison_bar")
 
                 # Add a Radar Chart for comparison
                 st.subheader("Radar Chart Comparison")
@@ -1067,7 +1501,7 @@ elif selected_page == "Country Similarity Analysis":
                 )
                 # Customize radar chart layout
                 radar_chart.update_traces(fill='toself')
-                st.plotly_chart(radar_chart, use_container_width=True)
+                st.plotly_chart(radar_chart, use_container_width=True, key="radar_chart")
 
                 # Add a Scatter Matrix for selected country and similar countries
                 st.subheader("Metric Scatter Matrix Comparison")
@@ -1090,7 +1524,7 @@ elif selected_page == "Country Similarity Analysis":
                     # scatter_matrix_fig.update_layout(
                     #     diagonal_visible=False # Hide diagonal histograms for clarity
                     # )
-                    st.plotly_chart(scatter_matrix_fig, use_container_width=True)
+                    st.plotly_chart(scatter_matrix_fig, use_container_width=True, key="scatter_matrix_fig")
                 else:
                     st.info("Please select at least one metric for the scatter matrix.")
 
@@ -1100,7 +1534,9 @@ elif selected_page == "Country Similarity Analysis":
     else:
         st.warning("Not enough data to perform similarity analysis after handling missing values.")
 
-elif selected_page == "Interactive Maps":
+
+@st.fragment
+def page_interactive_maps():
     st.title("🗺️ Interactive Maps")
     st.markdown("""
     Explore the global distribution of various TB metrics using interactive maps. Select a metric and a year to visualize the data across countries.
@@ -1116,37 +1552,14 @@ elif selected_page == "Interactive Maps":
         format_func=lambda x: x.replace('tb_', 'TB ').replace('_', ' ').title()
     )
 
-    # Use the full dataframe for animation
-    map_df = df.copy()
-
-    if not map_df.empty:
-        # Create the choropleth map with animation_frame
-        map_fig = px.choropleth(
-            map_df,
-            locations="iso3",
-            color=metric_to_map,
-            hover_name="country",
-            animation_frame="year", # Animate based on the year column
-            projection="equirectangular",
-            title=f"Global {metric_to_map.replace('tb_', 'TB ').replace('_', ' ').title()} Over Time", # General title for animation
-            color_continuous_scale="Viridis", # Use Viridis for sequential data
-            labels={metric_to_map: metric_to_map.replace('tb_', 'TB ').replace('_', ' ').title()}
-        )
-        map_fig.update_layout(
-            geo=dict(
-                showframe=False,
-                showcoastlines=True,
-                projection_type='equirectangular'
-            ),
-            margin=dict(l=0, r=0, t=30, b=0),
-            height=700, # Further increase map height
-            width=1200 # Further increase map width
-        )
-        st.plotly_chart(map_fig, use_container_width=True)
+    if not df.empty:
+        st.plotly_chart(animated_map_fig(df, metric_to_map), use_container_width=True, key="animated_map_fig")
     else:
         st.warning("Not enough data to display map for the selected options.")
 
-elif selected_page == "Documentation":
+
+@st.fragment
+def page_documentation():
     st.title("📚 Documentation")
     st.markdown("""
     # Global Tuberculosis (TB) Burden Dashboard
@@ -1185,3 +1598,16 @@ elif selected_page == "Documentation":
     """)
 
 
+PAGE_RENDERERS = {
+    "Global Overview": page_global_overview,
+    "Country Comparison": page_country_comparison,
+    "Trends Over Time": page_trends_over_time,
+    "Regional Analysis": page_regional_analysis,
+    "Country Profiles": page_country_profiles,
+    "Interactive Data Explorer": page_data_explorer,
+    "Country Similarity Analysis": page_country_similarity,
+    "Interactive Maps": page_interactive_maps,
+    "Documentation": page_documentation,
+}
+
+PAGE_RENDERERS[selected_page]()
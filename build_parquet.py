@@ -0,0 +1,77 @@
+import pandas as pd
+
+def build_parquet(csv_path, parquet_path):
+    # Same column renames and dtypes as load_data in app.py, applied once so
+    # the app can read a typed, compressed columnar file on cold start
+    column_renames = {
+        'country': 'country',
+        'iso3': 'iso3',
+        'region': 'region',
+        'year': 'year',
+        'population': 'population',
+        'incidence_rate': 'tb_incidence_100k',
+        'incidence_rate_lo': 'tb_incidence_100k_low',
+        'incidence_rate_hi': 'tb_incidence_100k_high',
+        'incidence_num': 'tb_incident_cases_total',
+        'incidence_num_lo': 'tb_incident_cases_low',
+        'incidence_num_hi': 'tb_incident_cases_high',
+        'mort_rate_no_hiv': 'tb_mortality_100k',
+        'mort_rate_no_hiv_lo': 'tb_mortality_100k_low',
+        'mort_rate_no_hiv_hi': 'tb_mortality_100k_high',
+        'hiv_in_tb_percent': 'hiv_in_tb_percent',
+        'hiv_in_tb_percent_lo': 'hiv_in_tb_percent_lo',
+        'hiv_in_tb_percent_hi': 'hiv_in_tb_percent_hi',
+        'detection_rate': 'detection_rate',
+        'detection_rate_lo': 'detection_rate_lo',
+        'detection_rate_hi': 'detection_rate_hi'
+    }
+
+    dtypes = {
+        'year': 'int32',
+        'population': 'int32',
+        'country': 'category',
+        'region': 'category',
+        'iso3': 'category',
+    }
+    for col in column_renames:
+        if col not in dtypes:
+            dtypes[col] = 'float32'
+
+    # Parse the CSV once with the final dtypes
+    df = pd.read_csv(
+        csv_path,
+        engine='pyarrow',
+        usecols=list(column_renames),
+        dtype=dtypes,
+    )
+    df = df.rename(columns=column_renames)
+
+    # Shared derived column used across the app's pages
+    df['actual_deaths'] = (
+        df['tb_mortality_100k'].to_numpy() * df['population'].to_numpy() / 100000
+    ).astype('float32')
+
+    # Keep each country's years contiguous for sequential group reads
+    df = df.sort_values(['country', 'year']).reset_index(drop=True)
+
+    # Save as compressed parquet
+    df.to_parquet(parquet_path, engine='pyarrow', compression='zstd')
+    print(f"Parquet data saved to {parquet_path}")
+
+    # Filter-independent Global Overview rollups, same shape the app's
+    # region_totals/top_countries helpers produce, so those pages become a
+    # plain read instead of an aggregation on first visit
+    region_rollup = df.groupby('region', sort=False, observed=True).agg(
+        {'tb_incident_cases_total': 'sum'}).reset_index()
+    region_rollup.to_parquet('data/region_rollup.parquet', engine='pyarrow')
+    country_rollup = df.groupby('country', sort=False, observed=True)[
+        'tb_incident_cases_total'].sum().nlargest(10).reset_index()
+    country_rollup.to_parquet('data/country_rollup.parquet', engine='pyarrow')
+    print("Rollups saved to data/region_rollup.parquet and data/country_rollup.parquet")
+    return df
+
+# Usage
+build_parquet(
+    csv_path='data/combined_tb_data_1990_2023.csv',
+    parquet_path='data/combined_tb_data_1990_2023.parquet'
+)
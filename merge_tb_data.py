@@ -1,10 +1,6 @@
 import pandas as pd
 
-def merge_tb_data(csv1_path, csv2_path, output_path):
-    # Load datasets with correct column types
-    df_new = pd.read_csv(csv1_path, dtype={'year': int})  # 2000-2023 data
-    df_old = pd.read_csv(csv2_path, dtype={'Year': int})   # 1990-2013 data
-
+def merge_tb_data(csv_old_path, csv_new_path, output_path):
     # Standardize column names for both datasets
     column_mapping_new = {
         'country': 'country',
@@ -56,9 +52,16 @@ def merge_tb_data(csv1_path, csv2_path, output_path):
         'Case detection rate (all forms), percent, high bound': 'detection_rate_hi'
     }
 
+    # Load only the columns we keep (the parser skips the rest at C level)
+    # with the merge-key dtype fixed up front
+    df_old = pd.read_csv(csv_old_path, usecols=list(column_mapping_old),
+                         dtype={'Year': 'int32'})  # 1990-2013 data
+    df_new = pd.read_csv(csv_new_path, usecols=list(column_mapping_new),
+                         dtype={'year': 'int32'})  # 2000-2023 data
+
     # Apply column renaming
-    df_new = df_new.rename(columns={k: v for k, v in column_mapping_new.items() if k in df_new.columns})
-    df_old = df_old.rename(columns={k: v for k, v in column_mapping_old.items() if k in df_old.columns})
+    df_new = df_new.rename(columns=column_mapping_new)
+    df_old = df_old.rename(columns=column_mapping_old)
 
     # Define final column set
     final_columns = [
@@ -85,26 +88,27 @@ def merge_tb_data(csv1_path, csv2_path, output_path):
         suffixes=('_old', '_new')
     )
 
-    # Combine columns preferring newer data where available
-    for col in final_columns:
-        if col in ['iso3', 'year']: continue  # Already used for merging
-        merged[col] = merged[f'{col}_new'].combine_first(merged[f'{col}_old'])
+    # Combine columns preferring newer data where available, in one pass
+    # instead of 20 per-column combine_first calls that fragment the frame
+    data_columns = [col for col in final_columns if col not in ['iso3', 'year']]
+    new_block = merged[[f'{col}_new' for col in data_columns]].rename(columns=lambda s: s[:-4])
+    old_block = merged[[f'{col}_old' for col in data_columns]].rename(columns=lambda s: s[:-4])
+    coalesced = new_block.where(new_block.notna(), old_block)
 
     # Clean up and sort
-    merged = merged[final_columns]
-    merged = merged.sort_values(['iso3', 'year'])
-    
-    # Handle remaining NA values
-    merged = merged.fillna('')
+    merged = pd.concat([merged[['iso3', 'year']], coalesced], axis=1)
+    merged = merged[final_columns].sort_values(['iso3', 'year'])
     
-    # Save to CSV
-    merged.to_csv(output_path, index=False)
+    # Save to CSV; writing NA as an empty field keeps the numeric columns
+    # numeric so to_csv stays on its vectorized path instead of the
+    # per-element object writer a blanket fillna('') would force
+    merged.to_csv(output_path, index=False, na_rep='')
     print(f"Merged data saved to {output_path}")
     return merged
 
 # Usage
 merge_tb_data(
-    csv1_path='data/TB_Burden_Country.csv',      # Newer data (2000-2023)
-    csv2_path='data/TB_burden_countries_2025-05-18.csv',  # Older data (1990-2013)
+    csv_old_path='data/TB_Burden_Country.csv',      # Older data (1990-2013)
+    csv_new_path='data/TB_burden_countries_2025-05-18.csv',  # Newer data (2000-2023)
     output_path='data/combined_tb_data_1990_2023.csv'
 )
\ No newline at end of file